@@ -1,4 +1,5 @@
 import abc
+import functools
 from typing import Generic, Iterable, Tuple, Type, TypeVar, cast, get_type_hints
 
 import jax
@@ -55,7 +56,8 @@ class FactorBase(_FactorBase, Generic[VariableValueTuple], abc.ABC, EnforceOverr
     ) -> Tuple[jnp.ndarray, ...]:
         """Compute Jacobian of residual with respect to local parameterization, by
         composing the residual computation Jacobian with the manifold retraction
-        Jacobian.
+        Jacobian. The former is computed with forward-mode autodiff, unless the
+        residual is smaller than the local parameterization of a connected variable.
 
         There are two options for specifying analytical Jacobians:
         1) Override this method directly,
@@ -76,12 +78,24 @@ class FactorBase(_FactorBase, Generic[VariableValueTuple], abc.ABC, EnforceOverr
         # (1) the residual wrt the variable parameters and (2) the variable parameters
         # wrt the local parameterization.
         assert len(self.variables) == len(variable_values)
+
+        # For (1), we default to forward-mode autodiff, which doesn't need to store
+        # residual computations for a backward pass; under vmap, this storage is
+        # per-factor. Reverse-mode is only used when the residual dimension is smaller
+        # than a variable's local parameter dimension, eg for projection factors (2 vs
+        # 6). Pose graph priors and between factors stay in forward-mode.
+        jacobian_fn = (
+            jax.jacfwd
+            if self.get_residual_dim()
+            >= max(v.get_local_parameter_dim() for v in self.variables)
+            else jax.jacrev
+        )
         jacobians = jax.tree_map(
             jnp.dot,
             tuple(
                 concatenate_leaves(tree, axis=-1)
                 for tree in reshape_leaves(
-                    jax.jacfwd(self.compute_residual_vector)(variable_values),
+                    jacobian_fn(self.compute_residual_vector)(variable_values),
                     (self.get_residual_dim(), -1),
                 )
             ),
@@ -131,29 +145,14 @@ class FactorBase(_FactorBase, Generic[VariableValueTuple], abc.ABC, EnforceOverr
         assert isinstance(variable_values, tuple)
 
         output: VariableValueTuple
-
-        try:
-            value_type: Type[VariableValueTuple] = get_type_hints(
-                self.compute_residual_vector
-            )["variable_values"]
-        except KeyError as e:
-            raise NotImplementedError(
-                f"Missing type hints for {type(self).__name__}.compute_residual_vector"
-            ) from e
-
-        # Function should be hinted with a tuple of some kind, but not `tuple` itself
-        assert issubtype(value_type, tuple), value_type is not tuple
-
-        # Heuristic: evaluates to `True` for NamedTuple types but `False` for
-        # `Tuple[...]` types. Note that standard superclass checking approaches don't
-        # work for NamedTuple types.
-        if type(value_type) is type:
-            # Hint is `NamedTuple`
-            tuple_content_types = tuple(get_type_hints(value_type).values())
+        (
+            value_type,
+            is_named_tuple,
+            tuple_content_types,
+        ) = type(self)._get_variable_value_tuple_hints()
+        if is_named_tuple:
             output = value_type(*variable_values)
         else:
-            # Hint is `typing.Tuple` annotation
-            tuple_content_types = get_args(value_type)
             output = cast(VariableValueTuple, variable_values)
 
         # Handle Ellipsis in type hints, eg `Tuple[SomeType, ...]`
@@ -172,6 +171,40 @@ class FactorBase(_FactorBase, Generic[VariableValueTuple], abc.ABC, EnforceOverr
 
         return output
 
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _get_variable_value_tuple_hints(
+        cls,
+    ) -> Tuple[Type[VariableValueTuple], bool, Tuple[type, ...]]:
+        """Resolve the variable value tuple type hinted on `compute_residual_vector`.
+        Cached, because resolving type hints is slow and factor stacks rebuild value
+        tuples every time they're traced.
+
+        Returns the hinted type, whether it's a `NamedTuple`, and the expected types
+        of its contents."""
+
+        try:
+            value_type: Type[VariableValueTuple] = get_type_hints(
+                cls.compute_residual_vector
+            )["variable_values"]
+        except KeyError as e:
+            raise NotImplementedError(
+                f"Missing type hints for {cls.__name__}.compute_residual_vector"
+            ) from e
+
+        # Function should be hinted with a tuple of some kind, but not `tuple` itself
+        assert issubtype(value_type, tuple), value_type is not tuple
+
+        # Heuristic: evaluates to `True` for NamedTuple types but `False` for
+        # `Tuple[...]` types. Note that standard superclass checking approaches don't
+        # work for NamedTuple types.
+        if type(value_type) is type:
+            # Hint is `NamedTuple`
+            return value_type, True, tuple(get_type_hints(value_type).values())
+        else:
+            # Hint is `typing.Tuple` annotation
+            return value_type, False, get_args(value_type)
+
     @final
     def anonymize_variables(self: FactorType) -> FactorType:
         """Returns a copy of this factor with all variables replaced with their
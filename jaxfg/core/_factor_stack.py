@@ -1,4 +1,4 @@
-from typing import Generic, List, Sequence, Tuple, Type, TypeVar
+from typing import Callable, Generic, List, Optional, Sequence, Tuple, Type, TypeVar
 
 import jax
 import jax_dataclasses
@@ -12,6 +12,33 @@ from ._variables import VariableBase
 
 FactorType = TypeVar("FactorType", bound=FactorBase)
 
+# Storage and Jacobian indices are stored as 32-bit integers, which halves their
+# footprint relative to numpy's default int64.
+_INDEX_DTYPE = onp.int32
+
+
+@jax_dataclasses.pytree_dataclass
+class ContiguousIndexRange:
+    """Stacked ranges of storage indices, where range `i` is `start[i] + arange(dim)`.
+
+    Variable values are always stored contiguously, so this is all we need to gather
+    them; compared to dense `(N, dim)` index arrays, gathering with slices lets XLA
+    emit contiguous loads.
+    """
+
+    start: hints.Array
+    """Start index of each range. Shape should be `(N,)`."""
+
+    dim: int = jax_dataclasses.static_field()
+    """Length of each range."""
+
+    def gather(self, storage: hints.Array) -> jnp.ndarray:
+        """Gather ranges from a flattened storage vector. Shape of output should be
+        `(N, dim)`."""
+        return jax.vmap(
+            lambda start: jax.lax.dynamic_slice_in_dim(storage, start, self.dim)
+        )(self.start)
+
 
 @jax_dataclasses.pytree_dataclass
 class FactorStack(Generic[FactorType]):
@@ -19,7 +46,13 @@ class FactorStack(Generic[FactorType]):
 
     num_factors: int = jax_dataclasses.static_field()
     factor: FactorType
-    value_indices: Tuple[hints.Array, ...]
+    value_indices: Tuple[ContiguousIndexRange, ...]
+    jacobian_chunk_size: Optional[int] = jax_dataclasses.static_field(default=None)
+    """If set, Jacobians are computed sequentially over chunks of this many factors
+    instead of all at once, which bounds the memory used by intermediates."""
+    valid_mask: Optional[hints.Array] = None
+    """Set for stacks padded with dummy factors. Shape should be `(N,)`: `True` for
+    real factors, `False` for padding, whose residuals and Jacobians are zeroed out."""
 
     def __post_init__(self):
         # There should be one set of indices for each variable type.
@@ -29,10 +62,8 @@ class FactorStack(Generic[FactorType]):
     #     # Check that shapes make sense.
     #     for variable, indices in zip(self.factor.variables, self.value_indices):
     #         residual_dim = self.factor.noise_model.get_residual_dim()
-    #         assert indices.shape == (
-    #             self.num_factors,
-    #             variable.get_parameter_dim(),
-    #         )
+    #         assert indices.start.shape == (self.num_factors,)
+    #         assert indices.dim == variable.get_parameter_dim()
     #         assert residual_dim == self.factor.get_residual_dim()
 
     @staticmethod
@@ -40,38 +71,59 @@ class FactorStack(Generic[FactorType]):
         factors: Sequence[FactorType],
         storage_metadata: StorageMetadata,
         use_onp: bool,
+        jacobian_chunk_size: Optional[int] = None,
+        pad_to_bucket: bool = False,
     ) -> "FactorStack[FactorType]":
-        """Make a stacked factor."""
+        """Make a stacked factor.
+
+        If `pad_to_bucket` is set, the stack is padded with dummy factors up to the
+        next power of two (and at least 16). Graphs with similar factor counts then
+        share shapes, which avoids JIT recompilation."""
 
         # For one-off computations, onp has much less overhead than jnp.
         jnp = onp if use_onp else globals()["jnp"]
 
+        # Pad with dummy factors.
+        valid_mask: Optional[onp.ndarray] = None
+        if pad_to_bucket:
+            num_factors = _get_bucket_size(len(factors))
+            valid_mask = onp.arange(num_factors) < len(factors)
+            factors = _pad_factors(factors, num_factors)
+
         # Stack factors in our group.
         # This requires that the treedefs of each factor match, which won't be
-        # the case when factors are connected to different variables!
-        stacked_factor: FactorType = jax.tree_map(
-            lambda *arrays: jnp.stack(arrays, axis=0),
-            *map(FactorBase.anonymize_variables, factors),  # type: ignore
-            # > https://github.com/python/mypy/issues/1317
+        # the case when factors are connected to different variables! Variables are
+        # static fields, so only the treedef depends on them: we anonymize a single
+        # factor, and stack leaves of the rest directly.
+        # Treedefs are already matched when factors are grouped, in
+        # `StackedFactorGraph.make()`; here we only guard against `zip()` silently
+        # truncating mismatched leaf lists.
+        treedef = jax.tree_structure(factors[0].anonymize_variables())
+        leaves_from_factor = [jax.tree_leaves(f) for f in factors]
+        assert all(
+            len(leaves) == treedef.num_leaves for leaves in leaves_from_factor
+        ), "Leaf counts of stacked factors must match"
+        stacked_factor: FactorType = jax.tree_unflatten(
+            treedef,
+            [jnp.stack(leaves, axis=0) for leaves in zip(*leaves_from_factor)],
         )
 
-        # Get indices for each variable of each factor.
-        value_indices_list: Tuple[List[onp.ndarray], ...] = tuple(
-            [] for _ in range(len(stacked_factor.variables))
-        )
-        for factor in factors:
-            for i, variable in enumerate(factor.variables):
-                assert isinstance(
-                    variable, type(factors[0].variables[i])
+        # Validate variable types. Skipped when assertions are disabled (`python -O`).
+        if __debug__:
+            expected_types = tuple(type(v) for v in factors[0].variables)
+            for factor in factors:
+                assert all(
+                    isinstance(v, t) for v, t in zip(factor.variables, expected_types)
                 ), "Variable types of stacked factors must match"
-                storage_pos = storage_metadata.index_from_variable[variable]
-                value_indices_list[i].append(
-                    onp.arange(storage_pos, storage_pos + variable.get_parameter_dim())
-                )
 
-        # Stack: end result should be Tuple[array of shape (N, parameter_dim), ...].
-        value_indices_stacked: Tuple[onp.ndarray, ...] = tuple(
-            onp.array(indices) for indices in value_indices_list
+        # Get index ranges for each variable of each factor.
+        assert storage_metadata.dim < 2 ** 31, "Storage too large for int32 indices"
+        value_indices_stacked: Tuple[ContiguousIndexRange, ...] = tuple(
+            ContiguousIndexRange(
+                start=FactorStack._get_storage_positions(factors, i, storage_metadata),
+                dim=variable.get_parameter_dim(),
+            )
+            for i, variable in enumerate(factors[0].variables)
         )
 
         # Record values.
@@ -79,6 +131,8 @@ class FactorStack(Generic[FactorType]):
             num_factors=len(factors),
             factor=stacked_factor,
             value_indices=value_indices_stacked,
+            jacobian_chunk_size=jacobian_chunk_size,
+            valid_mask=valid_mask,
         )
 
     @staticmethod
@@ -86,39 +140,45 @@ class FactorStack(Generic[FactorType]):
         factors: Sequence[FactorType],
         local_storage_metadata: StorageMetadata,
         row_offset: int,
+        num_factors: Optional[int] = None,
     ) -> List[sparse.SparseCooCoordinates]:
         """Computes Jacobian coordinates for a factor stack. One array of indices per
-        variable."""
+        variable. For padded stacks, `num_factors` should be set to the stack's
+        `num_factors`."""
+
+        if num_factors is not None:
+            factors = _pad_factors(factors, num_factors)
 
         variable_types: List[Type[VariableBase]] = [
             type(v) for v in factors[0].variables
         ]
 
-        # Get indices for each variable.
-        local_value_indices_list: Tuple[List[onp.ndarray], ...] = tuple(
-            [] for _ in range(len(variable_types))
-        )
-        for factor in factors:
-            for i, variable in enumerate(factor.variables):
-                # Record local parameterization indices.
-                storage_pos = local_storage_metadata.index_from_variable[variable]
-                local_value_indices_list[i].append(
-                    onp.arange(
-                        storage_pos,
-                        storage_pos + variable.get_local_parameter_dim(),
-                    )
-                )
-
-        # Stack: end result should be Tuple[array of shape (N, parameter_dim), ...].
+        # Get local parameterization indices for each variable.
+        # End result should be Tuple[array of shape (N, local_parameter_dim), ...].
+        assert (
+            local_storage_metadata.dim < 2 ** 31
+        ), "Storage too large for int32 indices"
         local_value_indices_stacked: Tuple[onp.ndarray, ...] = tuple(
-            onp.array(indices) for indices in local_value_indices_list
+            FactorStack._get_value_indices(
+                factors,
+                i,
+                local_storage_metadata,
+                dim=variable_type.get_local_parameter_dim(),
+            )
+            for i, variable_type in enumerate(variable_types)
         )
 
         # Get residual indices.
         num_factors = len(factors)
         residual_dim = factors[0].get_residual_dim()
-        residual_indices = onp.arange(num_factors * residual_dim).reshape(
-            (num_factors, residual_dim)
+        assert (
+            row_offset + num_factors * residual_dim < 2 ** 31
+        ), "Residual too large for int32 indices"
+        residual_indices = (
+            onp.arange(num_factors * residual_dim, dtype=_INDEX_DTYPE).reshape(
+                (num_factors, residual_dim)
+            )
+            + row_offset
         )
 
         # Get Jacobian coordinates.
@@ -126,35 +186,109 @@ class FactorStack(Generic[FactorType]):
         for variable_index, variable_type in enumerate(variable_types):
             variable_dim = variable_type.get_local_parameter_dim()
 
-            coords = onp.stack(
-                (
-                    # Row indices.
-                    onp.broadcast_to(
-                        residual_indices[:, :, None],
-                        (num_factors, residual_dim, variable_dim),
-                    )
-                    + row_offset,
-                    # Column indices.
-                    onp.broadcast_to(
-                        local_value_indices_stacked[variable_index][:, None, :],
-                        (num_factors, residual_dim, variable_dim),
-                    ),
-                ),
-                axis=-1,
-            ).reshape((num_factors * residual_dim * variable_dim, 2))
-
+            # Flatten broadcasted views directly: `reshape()` on a broadcasted array
+            # produces one contiguous copy, so we avoid materializing an intermediate
+            # stacked (row, col) array.
+            coords_shape = (num_factors, residual_dim, variable_dim)
             jacobian_coords.append(
                 sparse.SparseCooCoordinates(
-                    rows=coords[:, 0],
-                    cols=coords[:, 1],
+                    rows=onp.broadcast_to(
+                        residual_indices[:, :, None], coords_shape
+                    ).reshape(-1),
+                    cols=onp.broadcast_to(
+                        local_value_indices_stacked[variable_index][:, None, :],
+                        coords_shape,
+                    ).reshape(-1),
                 )
             )
 
         return jacobian_coords
 
+    @staticmethod
+    def _get_value_indices(
+        factors: Sequence[FactorType],
+        variable_index: int,
+        storage_metadata: StorageMetadata,
+        dim: int,
+    ) -> onp.ndarray:
+        """Compute storage indices of the `variable_index`-th variable of each factor,
+        used for Jacobian column coordinates. Output shape should be `(N, dim)`."""
+        return FactorStack._get_storage_positions(
+            factors, variable_index, storage_metadata
+        )[:, None] + onp.arange(dim, dtype=_INDEX_DTYPE)
+
+    @staticmethod
+    def _get_storage_positions(
+        factors: Sequence[FactorType],
+        variable_index: int,
+        storage_metadata: StorageMetadata,
+    ) -> onp.ndarray:
+        """Gather the storage start index of the `variable_index`-th variable of each
+        factor. Output shape should be `(N,)`."""
+        index_from_variable = storage_metadata.index_from_variable
+        return onp.fromiter(
+            (index_from_variable[f.variables[variable_index]] for f in factors),
+            dtype=_INDEX_DTYPE,
+            count=len(factors),
+        )
+
     def get_residual_dim(self) -> int:
         return self.factor.get_residual_dim() * self.num_factors
 
+    def _mask_padding(self, tree: hints.Pytree) -> hints.Pytree:
+        """Zero out outputs corresponding to padding factors. Leaves of `tree` should
+        have a leading axis of size `N`."""
+        if self.valid_mask is None:
+            return tree
+        valid_mask = self.valid_mask
+        return jax.tree_map(
+            lambda x: jnp.where(
+                valid_mask.reshape((-1,) + (1,) * (len(x.shape) - 1)), x, 0.0
+            ),
+            tree,
+        )
+
+    def _vmap_chunked(self, fun: Callable) -> Callable:
+        """Vectorize a function over our factors. If `jacobian_chunk_size` is set, we
+        `vmap` within chunks and loop over chunks with `jax.lax.map()`."""
+        chunk_size = self.jacobian_chunk_size
+        if chunk_size is None or chunk_size >= self.num_factors:
+            return jax.vmap(fun)
+
+        num_chunks, remainder = divmod(self.num_factors, chunk_size)
+        split = num_chunks * chunk_size
+
+        def fun_chunked(*args: hints.Pytree) -> hints.Pytree:
+            # Loop over full chunks
+            out = jax.lax.map(
+                lambda chunk: jax.vmap(fun)(*chunk),
+                jax.tree_map(
+                    lambda x: x[:split].reshape((num_chunks, chunk_size) + x.shape[1:]),
+                    args,
+                ),
+            )
+            out = jax.tree_map(lambda x: x.reshape((split,) + x.shape[2:]), out)
+
+            # Leftover factors
+            if remainder > 0:
+                out = jax.tree_map(
+                    lambda x, x_remainder: jnp.concatenate([x, x_remainder], axis=0),
+                    out,
+                    jax.vmap(fun)(*jax.tree_map(lambda x: x[split:], args)),
+                )
+            return out
+
+        return fun_chunked
+
+    def _get_values_stacked(
+        self, assignments: VariableAssignments
+    ) -> Tuple[hints.VariableValue, ...]:
+        """Gather stacked values of each variable connected to our factors."""
+        return tuple(
+            type(variable).unflatten_stacked(indices.gather(assignments.storage))
+            for variable, indices in zip(self.factor.variables, self.value_indices)
+        )
+
     def compute_residual_vector(self, assignments: VariableAssignments) -> jnp.ndarray:
         """Compute stacked residual vectors.
 
@@ -162,10 +296,7 @@ class FactorStack(Generic[FactorType]):
         """
 
         # Stack inputs to our factors.
-        values_stacked = tuple(
-            jax.vmap(type(variable).unflatten)(assignments.storage[indices])
-            for variable, indices in zip(self.factor.variables, self.value_indices)
-        )
+        values_stacked = self._get_values_stacked(assignments)
 
         # Vectorized residual computation.
         # The type of `values_stacked` should match `FactorVariableValues`.
@@ -173,7 +304,7 @@ class FactorStack(Generic[FactorType]):
             self.factor,
             self.factor.build_variable_value_tuple(values_stacked),
         )
-        return residual_vector
+        return self._mask_padding(residual_vector)
 
     def compute_residual_jacobian(
         self,
@@ -185,15 +316,26 @@ class FactorStack(Generic[FactorType]):
         """
 
         # Stack inputs to our factors.
-        values_stacked = tuple(
-            jax.vmap(variable.unflatten)(assignments.storage[indices])
-            for indices, variable in zip(self.value_indices, self.factor.variables)
-        )
+        values_stacked = self._get_values_stacked(assignments)
 
         # Compute Jacobians wrt local parameterizations.
         # The type of `values_stacked` should match `FactorVariableValues`.
-        jacobians = jax.vmap(type(self.factor).compute_residual_jacobians)(
+        jacobians = self._vmap_chunked(type(self.factor).compute_residual_jacobians)(
             self.factor,
             self.factor.build_variable_value_tuple(values_stacked),
         )
-        return jacobians
+        return self._mask_padding(jacobians)
+
+
+def _get_bucket_size(num_factors: int) -> int:
+    """Round a factor count up to the next power of two, with a minimum of 16."""
+    return max(16, 1 << (num_factors - 1).bit_length())
+
+
+def _pad_factors(
+    factors: Sequence[FactorType], num_factors: int
+) -> Sequence[FactorType]:
+    """Pad a factor group to `num_factors` by repeating the first factor. Padding
+    factors are well-defined copies, so their (masked) outputs never contain NaNs."""
+    assert num_factors >= len(factors)
+    return list(factors) + [factors[0]] * (num_factors - len(factors))
@@ -1,5 +1,15 @@
 from collections import defaultdict
-from typing import Collection, DefaultDict, Dict, Hashable, Iterable, List, Tuple, cast
+from typing import (
+    Collection,
+    DefaultDict,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    cast,
+)
 
 import jax
 import jax_dataclasses
@@ -38,7 +48,8 @@ class StackedFactorGraph:
     #             stacked_factor.value_indices,
     #             stacked_factor.factor.variables,
     #         ):
-    #             assert value_indices.shape == (N, variable.get_parameter_dim())
+    #             assert value_indices.start.shape == (N,)
+    #             assert value_indices.dim == variable.get_parameter_dim()
 
     def get_variables(self) -> Collection[VariableBase]:
         return self.local_storage_metadata.get_variables()
@@ -47,8 +58,21 @@ class StackedFactorGraph:
     def make(
         factors: Iterable[FactorBase],
         use_onp: bool = True,
+        jacobian_chunk_size: Optional[int] = None,
+        pad_factor_stacks: bool = False,
     ) -> "StackedFactorGraph":
-        """Create a factor graph from a set of factors."""
+        """Create a factor graph from a set of factors.
+
+        If `jacobian_chunk_size` is set, Jacobians of each factor stack are computed
+        in sequential chunks of this many factors. Useful for large graphs, where
+        vectorizing over all factors at once exhausts accelerator memory.
+
+        If `pad_factor_stacks` is set, each factor stack is padded with masked dummy
+        factors up to a power-of-two size. Useful when solving many graphs with
+        varying factor counts, which would otherwise each trigger a JIT recompile.
+        Note that storage metadata is static and keyed by variable identity, so
+        compiled code is only reused between graphs built from the same (ordered)
+        set of variable objects."""
 
         # Start by grouping our factors and grabbing a list of (ordered!) variables
         factors_from_group: DefaultDict[GroupKey, List[FactorBase]] = defaultdict(list)
@@ -88,6 +112,8 @@ class StackedFactorGraph:
                     group,
                     storage_metadata,
                     use_onp=use_onp,
+                    jacobian_chunk_size=jacobian_chunk_size,
+                    pad_to_bucket=pad_factor_stacks,
                 )
             )
 
@@ -95,13 +121,19 @@ class StackedFactorGraph:
             #
             # These should be N pairs of (row, col) indices, where rows correspond to
             # residual indices and columns correspond to local parameter indices
-            jacobian_coords.extend(
-                FactorStack.compute_jacobian_coords(
-                    factors=group,
-                    local_storage_metadata=local_storage_metadata,
-                    row_offset=residual_offset,
-                )
+            stacked_jacobian_coords = FactorStack.compute_jacobian_coords(
+                factors=group,
+                local_storage_metadata=local_storage_metadata,
+                row_offset=residual_offset,
+                num_factors=stacked_factors[-1].num_factors,
             )
+            assert all(
+                coords.rows.shape[0]
+                == stacked_factors[-1].get_residual_dim()
+                * type(variable).get_local_parameter_dim()
+                for coords, variable in zip(stacked_jacobian_coords, group[0].variables)
+            ), "Jacobian coordinates must match factor stack residual dimension"
+            jacobian_coords.extend(stacked_jacobian_coords)
             residual_offset += stacked_factors[-1].get_residual_dim()
 
         jacobian_coords_concat: sparse.SparseCooCoordinates = jax.tree_map(
@@ -212,6 +244,10 @@ class StackedFactorGraph:
             else:
                 assert False, f"Joint NLL not supported  for {type(noise_model)}"
             assert cov_determinants.shape == (stacked_factor.num_factors,)
+            if stacked_factor.valid_mask is not None:
+                cov_determinants = jnp.where(
+                    stacked_factor.valid_mask, cov_determinants, 0.0
+                )
 
             joint_nll = joint_nll + jnp.sum(cov_determinants)
 
@@ -321,3 +357,24 @@ class StackedFactorGraph:
     ) -> VariableAssignments:
         """Solve MAP inference problem."""
         return solver.solve(graph=self, initial_assignments=initial_assignments)
+
+    @jax.jit
+    def solve_batched(
+        self,
+        initial_assignments: VariableAssignments,
+        solver: NonlinearSolverBase = GaussNewtonSolver(
+            linear_solver=sparse.ConjugateGradientSolver()
+        ),
+    ) -> VariableAssignments:
+        """Solve a batch of MAP inference problems that share this graph, for example
+        from multiple initializations. `initial_assignments.storage` should have shape
+        `(M, storage_dim)`; outputs are stacked the same way.
+
+        Runs as one vectorized optimization loop, which terminates once every problem
+        in the batch has converged. Note that `sparse.CholmodSolver` does not support
+        `vmap`, so a conjugate gradient-based linear solver should be used."""
+        return jax.vmap(
+            lambda assignments: solver.solve(
+                graph=self, initial_assignments=assignments
+            )
+        )(initial_assignments)
@@ -116,7 +116,7 @@ class VariableAssignments:
         """Get values of all variables corresponding to a specific type."""
         index = self.storage_metadata.index_from_variable_type[variable_type]
         count = self.storage_metadata.count_from_variable_type[variable_type]
-        return jax.vmap(variable_type.unflatten)(
+        return variable_type.unflatten_stacked(
             self.storage[
                 index : index + variable_type.get_parameter_dim() * count
             ].reshape((count, variable_type.get_parameter_dim()))
@@ -178,10 +178,12 @@ class VariableAssignments:
             ].set(
                 jax.vmap(variable_type.flatten)(
                     jax.vmap(variable_type.manifold_retract)(
-                        jax.vmap(variable_type.unflatten)(batched_values_flat),
+                        variable_type.unflatten_stacked(batched_values_flat),
                         batched_deltas,
                     )
                 ).flatten()
             )
 
-        return jax_dataclasses.replace(self, storage=new_storage)
+        return VariableAssignments(
+            storage=new_storage, storage_metadata=self.storage_metadata
+        )
@@ -61,6 +61,20 @@ class VariableBase(abc.ABC, Generic[VariableValueType], EnforceOverrides):
             onp.zeros(cls.get_local_parameter_dim()),
         )
 
+    @classmethod
+    def unflatten_stacked(cls, flat: hints.Array) -> VariableValueType:
+        """Get stacked variable values from flattened representations. Equivalent to
+        `jax.vmap(cls.unflatten)(flat)`, but can be overridden when unflattening is a
+        trivial reshape or wrap to avoid the `vmap`.
+
+        Args:
+            flat (hints.Array): Array of shape `(N, parameter_dim)`.
+
+        Returns:
+            VariableValueType: Stacked variable values.
+        """
+        return jax.vmap(cls.unflatten)(flat)
+
     # (4) Shared implementation details.
 
     _parameter_dim: ClassVar[int]
@@ -147,6 +161,13 @@ class _RealVectorVariableTemplate:
             def get_default_value() -> hints.Array:
                 return jnp.zeros(dim)
 
+            @classmethod
+            @overrides
+            @final
+            def unflatten_stacked(cls, flat: hints.Array) -> hints.Array:
+                # Values are already stored flattened.
+                return flat
+
         return _RealVectorVariable
 
 
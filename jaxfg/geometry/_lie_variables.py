@@ -4,6 +4,7 @@ from typing import ClassVar, Generic, Type, TypeVar, cast
 import jaxlie
 from overrides import final, overrides
 
+from .. import hints
 from ..core._variables import VariableBase
 
 T = TypeVar("T", bound=jaxlie.MatrixLieGroup)
@@ -55,6 +56,16 @@ class LieVariableBase(Generic[T], VariableBase[T]):
             jaxlie.manifold.rplus_jacobian_parameters_wrt_delta(x)
         )
 
+    # (4) Optional: faster unflattening for stacked values.
+
+    @classmethod
+    @final
+    @overrides
+    def unflatten_stacked(cls, flat: hints.Array) -> T:
+        # Lie group parameters are stored as-is, so stacked values can be wrapped
+        # directly.
+        return cls.get_group_type()(flat)
+
 
 class SO2Variable(LieVariableBase[jaxlie.SO2]):
     @staticmethod
@@ -1,5 +1,6 @@
 from typing import TYPE_CHECKING
 
+import jax
 import jax_dataclasses
 from jax import numpy as jnp
 from overrides import overrides
@@ -152,14 +153,18 @@ class DoglegSolver(
             ),
         )
 
-        # Get output assignments
-        assignments = jax_dataclasses.replace(
-            state_prev.assignments,
-            storage=jnp.where(
-                accept_flag,
-                assignments_proposed.storage,
-                state_prev.assignments.storage,
+        # Get output assignments: use old values if update is rejected. `accept_flag`
+        # is a scalar, so we branch to pick whole arrays instead of selecting
+        # elementwise.
+        assignments, cost, residual_vector = jax.lax.cond(
+            accept_flag,
+            lambda _: (assignments_proposed, proposed_cost, residual_vector),
+            lambda _: (
+                state_prev.assignments,
+                state_prev.cost,
+                state_prev.residual_vector,
             ),
+            None,
         )
 
         # Check for convergence
@@ -180,9 +185,7 @@ class DoglegSolver(
             iterations=state_prev.iterations + 1,
             assignments=assignments,
             radius=radius,
-            cost=jnp.where(
-                accept_flag, proposed_cost, state_prev.cost
-            ),  # Use old cost if update is rejected
+            cost=cost,
             residual_vector=residual_vector,
             done=done,
         )
@@ -1,5 +1,6 @@
 from typing import TYPE_CHECKING
 
+import jax
 import jax_dataclasses
 from jax import numpy as jnp
 from overrides import overrides
@@ -7,7 +8,12 @@ from overrides import overrides
 from .. import hints, sparse
 from ..core._variable_assignments import VariableAssignments
 from ._mixins import _TerminationCriteriaMixin, _TrustRegionMixin
-from ._nonlinear_solver_base import NonlinearSolverBase, NonlinearSolverState
+from ._nonlinear_solver_base import (
+    Boolean,
+    Int,
+    NonlinearSolverBase,
+    NonlinearSolverState,
+)
 
 if TYPE_CHECKING:
     from ..core._stacked_factor_graph import StackedFactorGraph
@@ -20,13 +26,32 @@ class _LevenbergMarquardtState(NonlinearSolverState):
     lambd: hints.Scalar
 
 
+@jax_dataclasses.pytree_dataclass
+class _DampedStep:
+    """Proposed update from a single damped linear solve, computed from a fixed
+    linearization point."""
+
+    iterations: Int
+    lambd: hints.Scalar
+    step_vector: jnp.ndarray
+    assignments: VariableAssignments
+    cost: hints.Scalar
+    residual_vector: hints.Array
+    accept_flag: Boolean
+
+
 @jax_dataclasses.pytree_dataclass
 class LevenbergMarquardtSolver(
     NonlinearSolverBase[_LevenbergMarquardtState],
     _TerminationCriteriaMixin,
     _TrustRegionMixin,
 ):
-    """Simple damped least-squares implementation."""
+    """Simple damped least-squares implementation.
+
+    Rejected steps are retried with increased damping before re-linearizing, and each
+    attempt counts as an iteration. With `verbose` set, one line is printed per attempt;
+    the printed cost is the cost at the linearization point, so it repeats across
+    attempts until a step is accepted."""
 
     lambda_initial: hints.Scalar = 5e-4
     lambda_factor: hints.Scalar = 2.0
@@ -56,17 +81,6 @@ class LevenbergMarquardtSolver(
         graph: "StackedFactorGraph",
         state_prev: _LevenbergMarquardtState,
     ) -> _LevenbergMarquardtState:
-        # There's currently some redundancy here: we only need to re-linearize when
-        # updates are accepted
-
-        self._hcb_print(
-            lambda i, max_i, cost, lambd: f"Iteration #{i}/{max_i}: cost={str(cost).ljust(15)} lambda={str(lambd)}",
-            i=state_prev.iterations,
-            max_i=self.max_iterations,
-            cost=state_prev.cost,
-            lambd=state_prev.lambd,
-        )
-
         # Linearize graph
         A: sparse.SparseCooMatrix = graph.compute_whitened_residual_jacobian(
             assignments=state_prev.assignments,
@@ -74,66 +88,133 @@ class LevenbergMarquardtSolver(
         )
         ATb = A.T @ -state_prev.residual_vector
 
-        # Solve linear subproblem
-        step_vector: jnp.ndarray = self.linear_solver.solve_subproblem(
-            A=A,
-            ATb=ATb,
-            lambd=state_prev.lambd,
-            iteration=state_prev.iterations,
-        )
-        local_delta_assignments = VariableAssignments(
-            storage=step_vector,
-            storage_metadata=graph.local_storage_metadata,
-        )
-
-        # On-manifold retraction + solution check
-        assignments_proposed = state_prev.assignments.manifold_retract(
-            local_delta_assignments=local_delta_assignments
-        )
-        proposed_cost, residual_vector = graph.compute_cost(assignments_proposed)
-        accept_flag = (
-            self.compute_step_quality(
+        def propose_step(lambd: hints.Scalar, iterations: Int) -> _DampedStep:
+            """Solve damped linear subproblem, then retract + check solution."""
+            self._hcb_print(
+                lambda i, max_i, cost, lambd: f"Iteration #{i}/{max_i}: cost={str(cost).ljust(15)} lambda={str(lambd)}",
+                i=iterations,
+                max_i=self.max_iterations,
+                cost=state_prev.cost,
+                lambd=lambd,
+            )
+            step_vector: jnp.ndarray = self.linear_solver.solve_subproblem(
                 A=A,
-                proposed_cost=proposed_cost,
-                state_prev=state_prev,
+                ATb=ATb,
+                lambd=lambd,
+                iteration=iterations,
+            )
+            assignments_proposed = state_prev.assignments.manifold_retract(
+                local_delta_assignments=VariableAssignments(
+                    storage=step_vector,
+                    storage_metadata=graph.local_storage_metadata,
+                )
+            )
+            proposed_cost, proposed_residual_vector = graph.compute_cost(
+                assignments_proposed
+            )
+            accept_flag = (
+                self.compute_step_quality(
+                    A=A,
+                    proposed_cost=proposed_cost,
+                    state_prev=state_prev,
+                    step_vector=step_vector,
+                )
+                >= self.step_quality_min
+            )
+            return _DampedStep(
+                iterations=iterations,
+                lambd=lambd,
                 step_vector=step_vector,
+                assignments=assignments_proposed,
+                cost=proposed_cost,
+                residual_vector=proposed_residual_vector,
+                accept_flag=accept_flag,
             )
-            >= self.step_quality_min
-        )
 
-        # Update damping
-        # In the future, we may consider more sophisticated lambda updates, eg:
+        # Rejected steps leave the linearization point unchanged, so instead of
+        # returning to the outer loop and re-linearizing, we increase damping and
+        # re-solve with the same Jacobian until a step is accepted. Each attempt still
+        # counts as an iteration. Similar to:
         # > METHODS FOR NON-LINEAR LEAST SQUARES PROBLEM, Madsen et al 2004.
         # > pg. 27, Algorithm 3.16
+        #
+        # The loop is seeded with a placeholder one iteration behind `state_prev`, so
+        # `propose_step()` is only traced once.
+        def is_first_attempt(proposal: _DampedStep) -> Boolean:
+            return proposal.iterations < state_prev.iterations
+
+        proposal = jax.lax.while_loop(
+            cond_fun=lambda proposal: jnp.logical_or(
+                is_first_attempt(proposal),
+                jnp.logical_not(
+                    jnp.logical_or(
+                        proposal.accept_flag,
+                        proposal.iterations >= (self.max_iterations - 1),
+                    )
+                ),
+            ),
+            body_fun=lambda proposal: propose_step(
+                lambd=jnp.where(
+                    is_first_attempt(proposal),
+                    state_prev.lambd,
+                    self._increase_damping(proposal.lambd),
+                ),
+                iterations=proposal.iterations + 1,
+            ),
+            init_val=_DampedStep(
+                iterations=state_prev.iterations - 1,
+                lambd=state_prev.lambd,
+                step_vector=jnp.zeros_like(ATb),
+                assignments=state_prev.assignments,
+                cost=state_prev.cost,
+                residual_vector=state_prev.residual_vector,
+                accept_flag=jnp.asarray(False),
+            ),
+        )
+        accept_flag = proposal.accept_flag
+        local_delta_assignments = VariableAssignments(
+            storage=proposal.step_vector,
+            storage_metadata=graph.local_storage_metadata,
+        )
+
+        # Update damping
         lambd = jnp.where(
             accept_flag,
             # If accept, decrease damping: note that we *don't* enforce any bounds here
-            state_prev.lambd / self.lambda_factor,
+            proposal.lambd / self.lambda_factor,
             # If reject: increase lambda and enforce bounds
-            jnp.maximum(
-                self.lambda_min,
-                jnp.minimum(state_prev.lambd * self.lambda_factor, self.lambda_max),
-            ),
+            self._increase_damping(proposal.lambd),
         )
 
-        # Get output assignments
-        assignments = jax_dataclasses.replace(
-            state_prev.assignments,
-            storage=jnp.where(
-                accept_flag,
-                assignments_proposed.storage,
-                state_prev.assignments.storage,
+        # Get outputs: use old values if update is rejected. `accept_flag` is a scalar,
+        # so we branch to pick whole arrays instead of selecting elementwise.
+        assignments, cost, residual_vector = jax.lax.cond(
+            accept_flag,
+            lambda _: (proposal.assignments, proposal.cost, proposal.residual_vector),
+            lambda _: (
+                state_prev.assignments,
+                state_prev.cost,
+                state_prev.residual_vector,
             ),
+            None,
         )
 
         # Check for convergence
         done = jnp.logical_or(
-            self.check_exceeded_max_iterations(state_prev=state_prev),
+            proposal.iterations >= (self.max_iterations - 1),
             jnp.logical_and(
                 accept_flag,
                 self.check_convergence(
-                    state_prev=state_prev,
-                    cost_updated=proposed_cost,
+                    # Gradient tolerance start step should count inner attempts
+                    state_prev=_LevenbergMarquardtState(
+                        iterations=proposal.iterations,
+                        assignments=state_prev.assignments,
+                        cost=state_prev.cost,
+                        residual_vector=state_prev.residual_vector,
+                        done=state_prev.done,
+                        lambd=state_prev.lambd,
+                    ),
+                    cost_updated=proposal.cost,
                     local_delta_assignments=local_delta_assignments,
                     negative_gradient=ATb,
                 ),
@@ -141,12 +222,17 @@ class LevenbergMarquardtSolver(
         )
 
         return _LevenbergMarquardtState(
-            iterations=state_prev.iterations + 1,
+            iterations=proposal.iterations + 1,
             assignments=assignments,
             lambd=lambd,
-            cost=jnp.where(
-                accept_flag, proposed_cost, state_prev.cost
-            ),  # Use old cost if update is rejected
+            cost=cost,
             residual_vector=residual_vector,
             done=done,
         )
+
+    def _increase_damping(self, lambd: hints.Scalar) -> hints.Scalar:
+        """Increase damping after a rejected step, and enforce bounds."""
+        return jnp.maximum(
+            self.lambda_min,
+            jnp.minimum(lambd * self.lambda_factor, self.lambda_max),
+        )
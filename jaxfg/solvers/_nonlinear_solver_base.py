@@ -41,7 +41,8 @@ class _NonlinearSolverBase:
     """Nonlinear solver interface."""
 
     verbose: Boolean = jax_dataclasses.static_field(default=True)
-    """Set to `True` to enable printing."""
+    """Set to `True` to enable printing. Static, so solvers with `verbose=False` are
+    traced without any host callbacks in their optimization loop."""
 
     linear_solver: sparse.LinearSubproblemSolverBase = jax_dataclasses.field(
         default_factory=lambda: sparse.CholmodSolver()
@@ -109,6 +110,8 @@ class NonlinearSolverBase(
         """Helper for printer optimizer messages via host callbacks. No-op if `verbose`
         is set to `False`."""
 
+        # Checked at trace time: when `verbose` is off, no callback is added to the
+        # computation graph at all.
         if not self.verbose:
             return
 
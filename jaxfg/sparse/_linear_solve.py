@@ -24,7 +24,12 @@ class LinearSubproblemSolverBase(abc.ABC, EnforceOverrides):
         lambd: hints.Scalar,
         iteration: hints.Scalar,
     ) -> jnp.ndarray:
-        """Solve a linear subproblem."""
+        """Solve a linear subproblem.
+
+        Nonlinear solvers call this from inside `jax.lax.while_loop()`, so `lambd` and
+        `iteration` will typically be traced: implementations should only use them
+        in array arithmetic (not Python control flow), which keeps the loop body a
+        single static graph."""
 
 
 class _LinearSolverArgs(NamedTuple):
@@ -12,7 +12,9 @@ import pathlib
 
 import _g2o_utils
 import datargs
+import jax
 import matplotlib.pyplot as plt
+import numpy as onp
 
 import jaxfg
 
@@ -48,6 +50,15 @@ class CliArgs:
         default=SolverType.GAUSS_NEWTON,
         help="Nonlinear solver to use.",
     )
+    multistart_count: int = datargs.arg(
+        default=0,
+        help="If positive, also time a batched solve from this many perturbed initial "
+        "guesses. Uses a conjugate gradient linear solver.",
+    )
+    multistart_noise: float = datargs.arg(
+        default=0.01,
+        help="Standard deviation of local perturbations for multi-start solves.",
+    )
 
 
 def main():
@@ -92,6 +103,41 @@ def main():
         solution_poses = graph.solve(initial_poses, solver=cli_args.solver_type.value)
         solution_poses.storage.block_until_ready()
 
+    # Time batched solver
+    if cli_args.multistart_count > 0:
+        with jaxfg.utils.stopwatch("Making perturbed initial poses"):
+            local_deltas = onp.random.normal(
+                scale=cli_args.multistart_noise,
+                size=(cli_args.multistart_count, graph.local_storage_metadata.dim),
+            )
+            initial_poses_stacked = jax.vmap(
+                lambda local_delta: initial_poses.manifold_retract(
+                    jaxfg.core.VariableAssignments(
+                        storage=local_delta,
+                        storage_metadata=graph.local_storage_metadata,
+                    )
+                )
+            )(local_deltas)
+
+        # CHOLMOD runs via a host callback, which can't be batched
+        solver = dataclasses.replace(
+            cli_args.solver_type.value,
+            linear_solver=jaxfg.sparse.ConjugateGradientSolver(),
+            verbose=False,
+        )
+        with jaxfg.utils.stopwatch(
+            f"Batched solve x{cli_args.multistart_count} (JIT compile + solve)"
+        ):
+            graph.solve_batched(
+                initial_poses_stacked, solver=solver
+            ).storage.block_until_ready()
+        with jaxfg.utils.stopwatch(
+            f"Batched solve x{cli_args.multistart_count} (already compiled)"
+        ):
+            graph.solve_batched(
+                initial_poses_stacked, solver=solver
+            ).storage.block_until_ready()
+
     # Plot
     plt.figure()
 
@@ -2,7 +2,9 @@
 
 from typing import Tuple
 
+import jax
 import jax_dataclasses
+import numpy as onp
 from jax import numpy as jnp
 from overrides import overrides
 
@@ -91,3 +93,86 @@ def test_integration():
     assert graph.compute_joint_nll(initial_assignments) > graph.compute_joint_nll(
         solution_assignments
     )
+
+
+def test_chunked_jacobian():
+    """Chunked Jacobian computation should match fully vectorized computation."""
+
+    variables = [Variable() for i in range(5)]
+    factors = [UniFactor.make(v) for v in variables] + [
+        BiFactor.make(variables[i], variables[i + 1]) for i in range(4)
+    ]
+    graph = jaxfg.core.StackedFactorGraph.make(factors)
+    graph_chunked = jaxfg.core.StackedFactorGraph.make(factors, jacobian_chunk_size=2)
+    assignments = jaxfg.core.VariableAssignments.make_from_defaults(variables)
+
+    residual_vector = graph.compute_whitened_residual_vector(assignments)
+    A = graph.compute_whitened_residual_jacobian(assignments, residual_vector)
+    A_chunked = graph_chunked.compute_whitened_residual_jacobian(
+        assignments, residual_vector
+    )
+
+    onp.testing.assert_allclose(A_chunked.as_dense(), A.as_dense())
+
+
+def test_padded_factor_stacks():
+    """Padding factor stacks with dummy factors shouldn't change results."""
+
+    variables = [Variable() for i in range(3)]
+    factors = [UniFactor.make(variables[0])] + [
+        BiFactor.make(variables[i], variables[i + 1]) for i in range(2)
+    ]
+    graph = jaxfg.core.StackedFactorGraph.make(factors)
+    graph_padded = jaxfg.core.StackedFactorGraph.make(factors, pad_factor_stacks=True)
+    assert all(stack.num_factors == 16 for stack in graph_padded.factor_stacks)
+
+    initial_assignments = jaxfg.core.VariableAssignments.make_from_defaults(variables)
+    onp.testing.assert_allclose(
+        graph_padded.compute_cost(initial_assignments)[0],
+        graph.compute_cost(initial_assignments)[0],
+    )
+    onp.testing.assert_allclose(
+        graph_padded.compute_joint_nll(initial_assignments),
+        graph.compute_joint_nll(initial_assignments),
+        rtol=1e-5,
+    )
+    onp.testing.assert_allclose(
+        graph_padded.solve(initial_assignments).storage,
+        graph.solve(initial_assignments).storage,
+        atol=1e-4,
+        rtol=1e-4,
+    )
+
+
+def test_padded_factor_stacks_shared_trace():
+    """Padded graphs over the same variables should share a single trace, even with
+    different factor counts."""
+
+    variables = [Variable() for i in range(4)]
+    unary_factors = [UniFactor.make(v) for v in variables]
+    graph_small = jaxfg.core.StackedFactorGraph.make(
+        unary_factors + [BiFactor.make(variables[0], variables[1])],
+        pad_factor_stacks=True,
+    )
+    graph_large = jaxfg.core.StackedFactorGraph.make(
+        unary_factors
+        + [BiFactor.make(variables[i], variables[i + 1]) for i in range(3)],
+        pad_factor_stacks=True,
+    )
+    assignments = jaxfg.core.VariableAssignments.make_from_defaults(variables)
+
+    trace_count = 0
+
+    @jax.jit
+    def compute_cost(
+        graph: jaxfg.core.StackedFactorGraph,
+        assignments: jaxfg.core.VariableAssignments,
+    ) -> jnp.ndarray:
+        nonlocal trace_count
+        trace_count += 1
+        return graph.compute_cost(assignments)[0]
+
+    cost_small = compute_cost(graph_small, assignments)
+    cost_large = compute_cost(graph_large, assignments)
+    assert trace_count == 1
+    assert cost_small < cost_large
@@ -2,7 +2,9 @@
 
 from typing import List
 
+import jax
 import jaxlie
+import numpy as onp
 from jax import numpy as jnp
 
 import jaxfg
@@ -199,3 +201,103 @@ def test_pose_graph_dogleg():
             jaxfg.geometry.SE2Variable
         ).parameters()[1]
     )
+
+
+def test_pose_graph_solve_batched():
+    pose_variables = [
+        jaxfg.geometry.SE2Variable(),
+        jaxfg.geometry.SE2Variable(),
+    ]
+
+    factors: List[jaxfg.core.FactorBase] = [
+        jaxfg.geometry.PriorFactor.make(
+            variable=pose_variables[0],
+            mu=jaxlie.SE2.from_xy_theta(0.0, 0.0, 0.0),
+            noise_model=jaxfg.noises.DiagonalGaussian.make_from_covariance(
+                diagonal=jnp.ones(3)
+            ),
+        ),
+        jaxfg.geometry.PriorFactor.make(
+            variable=pose_variables[1],
+            mu=jaxlie.SE2.from_xy_theta(2.0, 0.0, 0.0),
+            noise_model=jaxfg.noises.DiagonalGaussian.make_from_covariance(
+                diagonal=jnp.ones(3)
+            ),
+        ),
+        jaxfg.geometry.BetweenFactor.make(
+            variable_T_world_a=pose_variables[0],
+            variable_T_world_b=pose_variables[1],
+            T_a_b=jaxlie.SE2.from_xy_theta(1.0, 0.0, 0.0),
+            noise_model=jaxfg.noises.DiagonalGaussian.make_from_covariance(
+                diagonal=jnp.ones(3)
+            ),
+        ),
+    ]
+
+    graph = jaxfg.core.StackedFactorGraph.make(factors)
+    initial_assignments = [
+        jaxfg.core.VariableAssignments.make_from_defaults(pose_variables),
+        jaxfg.core.VariableAssignments.make_from_dict(
+            {
+                pose_variables[0]: jaxlie.SE2.from_xy_theta(0.5, -0.5, 0.2),
+                pose_variables[1]: jaxlie.SE2.from_xy_theta(1.0, 1.0, -0.3),
+            }
+        ),
+    ]
+    solver = jaxfg.solvers.LevenbergMarquardtSolver(
+        linear_solver=jaxfg.sparse.ConjugateGradientSolver()
+    )
+
+    solutions_stacked = graph.solve_batched(
+        jaxfg.core.VariableAssignments(
+            storage=jnp.stack([a.storage for a in initial_assignments]),
+            storage_metadata=initial_assignments[0].storage_metadata,
+        ),
+        solver=solver,
+    )
+    assert solutions_stacked.storage.shape == (2, 8)
+
+    # Batched solutions should match solving one at a time
+    for i, initial in enumerate(initial_assignments):
+        onp.testing.assert_allclose(
+            solutions_stacked.storage[i],
+            graph.solve(initial, solver=solver).storage,
+            atol=1e-4,
+            rtol=1e-4,
+        )
+
+
+def test_between_factor_jacobian_modes(monkeypatch):
+    """Forward and reverse-mode Jacobians should match for Lie group factors."""
+    pose_variables = [
+        jaxfg.geometry.SE3Variable(),
+        jaxfg.geometry.SE3Variable(),
+    ]
+    factor = jaxfg.geometry.BetweenFactor.make(
+        variable_T_world_a=pose_variables[0],
+        variable_T_world_b=pose_variables[1],
+        T_a_b=jaxlie.SE3.exp(jnp.array([1.0, 0.0, 0.5, 0.1, -0.2, 0.3])),
+        noise_model=jaxfg.noises.DiagonalGaussian.make_from_covariance(
+            diagonal=jnp.ones(6)
+        ),
+    )
+    variable_values = (
+        jaxlie.SE3.exp(jnp.array([0.2, -0.3, 0.1, 0.4, 0.0, -0.1])),
+        jaxlie.SE3.exp(jnp.array([-0.5, 0.2, 0.3, 0.0, 0.2, 0.1])),
+    )
+
+    # `BetweenFactor` specifies analytical Jacobians, so we call the autodiff
+    # implementation directly. 6 residual terms vs 6 local parameters per variable
+    # should default to forward-mode.
+    jacobians_fwd = jaxfg.core.FactorBase.compute_residual_jacobians(
+        factor, variable_values
+    )
+    monkeypatch.setattr(jax, "jacfwd", jax.jacrev)
+    jacobians_rev = jaxfg.core.FactorBase.compute_residual_jacobians(
+        factor, variable_values
+    )
+
+    assert len(jacobians_fwd) == len(jacobians_rev) == 2
+    for jacobian_fwd, jacobian_rev in zip(jacobians_fwd, jacobians_rev):
+        assert jacobian_fwd.shape == (6, 6)
+        onp.testing.assert_allclose(jacobian_fwd, jacobian_rev, atol=1e-5, rtol=1e-5)